@@ -5,26 +5,138 @@ Search and filter Claude Code plugins from the marketplace JSON file.
 """
 
 import json
-import argparse
+import functools
+import pickle
+from collections import Counter
 import sys
 import os
 import time
-import subprocess
 import re
-from typing import List, Dict, Any, Optional, Tuple
+import threading
+from urllib.parse import quote, urljoin, urlsplit
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Pattern, Set, Tuple
+
+if TYPE_CHECKING:
+    import http.client
+    from concurrent.futures import Future
+
+# Prefer orjson when available; its errors subclass json.JSONDecodeError.
+# Both paths parse bytes directly and serialize to bytes.
+try:
+    import orjson
+    _loads = orjson.loads
+    _dumps = orjson.dumps
+except ImportError:
+    _loads = json.loads
+
+    def _dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode('utf-8')
 
 
 CACHE_DURATION = 60 * 60  # 60 minutes in seconds
+MAX_DOWNLOAD_WORKERS = 8
+MAX_GITHUB_WORKERS = 10
+CONNECT_TIMEOUT = 5  # seconds
+HTTP_RETRIES = 2
+HTTP_RETRY_BACKOFF = 0.3  # seconds
+MAX_REDIRECTS = 5
+GITHUB_HOSTS = ('api.github.com', 'raw.githubusercontent.com')
+GITHUB_API_HEADERS = {'Accept': 'application/vnd.github.v3+json'}
+GITHUB_REQUEST_RATE = 10  # sustained requests per second per host
+GITHUB_REQUEST_BURST = 10
+MAX_RATE_LIMIT_WAIT = 60  # seconds; longer limits fail fast and fall back to cache
+
+_TOKEN_RE = re.compile(r'\w+')
+_GH_REPO_RE = re.compile(r'github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/|$)')
+_GH_TREE_RE = re.compile(r'github\.com/([^/]+)/([^/]+)/tree/([^/]+)')
+_GH_USERCONTENT_RE = re.compile(r'github(?:usercontent)?\.com/([^/]+)/([^/]+)')
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(SCRIPT_DIR, "data")
 MARKETPLACES_CONFIG = os.path.join(SCRIPT_DIR, "marketplaces.json")
+GITHUB_CACHE_DIR = os.path.join(DATA_DIR, "_ghcache")
+MERGED_CACHE = os.path.join(DATA_DIR, "_merged.pkl")
+MERGED_CACHE_VERSION = 2  # bump when the merged plugin/index layout changes
+
+# Keep-alive HTTPS connections, one per host per thread
+_connections = threading.local()
+
+
+class RateLimiter:
+    """
+    Token-bucket throttle shared by all threads talking to one GitHub host.
+    Also honors Retry-After and X-RateLimit-* headers: short limits pause
+    every worker until the reset, long ones make further requests fail fast.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._exhausted_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """
+        Wait until a request may be sent.
+
+        Raises:
+            ConnectionError if the rate limit is exhausted for longer than MAX_RATE_LIMIT_WAIT
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._exhausted_until:
+                raise ConnectionError(
+                    f"GitHub rate limit exceeded (resets in {int(self._exhausted_until - now)}s)"
+                )
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Reserve a token; a negative balance is the wait for the next refill
+            self._tokens -= 1
+            delay = max(-self._tokens / self.rate, self._blocked_until - now, 0)
+        if delay:
+            time.sleep(delay)
+
+    def record(self, status: int, headers: Any) -> bool:
+        """
+        Update limits from a response's rate-limit headers.
+
+        Returns:
+            True if the request was rate limited and should be retried
+        """
+        retry_after = headers.get('Retry-After')
+        remaining = headers.get('X-RateLimit-Remaining')
+        limited = status in (403, 429) and (retry_after is not None or remaining == '0')
+        if not limited and remaining != '0':
+            return False
+
+        reset = headers.get('X-RateLimit-Reset')
+        if retry_after and retry_after.isdigit():
+            wait = int(retry_after)
+        elif reset and reset.isdigit():
+            wait = max(0, int(reset) - time.time())
+        else:
+            wait = MAX_RATE_LIMIT_WAIT
 
+        with self._lock:
+            until = time.monotonic() + wait
+            if wait > MAX_RATE_LIMIT_WAIT:
+                self._exhausted_until = max(self._exhausted_until, until)
+                return False
+            self._blocked_until = max(self._blocked_until, until)
+        return limited
+
+
+_rate_limiters = {host: RateLimiter(GITHUB_REQUEST_RATE, GITHUB_REQUEST_BURST) for host in GITHUB_HOSTS}
 
+
+@functools.lru_cache(maxsize=1)
 def load_marketplaces_config() -> List[Dict[str, str]]:
     """Load marketplace configurations from marketplaces.json"""
     try:
-        with open(MARKETPLACES_CONFIG, 'r') as f:
-            config = json.load(f)
+        with open(MARKETPLACES_CONFIG, 'rb') as f:
+            config = _loads(f.read())
             return config.get('marketplaces', [])
     except FileNotFoundError:
         print(f"Error: {MARKETPLACES_CONFIG} not found", file=sys.stderr)
@@ -34,137 +146,322 @@ def load_marketplaces_config() -> List[Dict[str, str]]:
         sys.exit(1)
 
 
-def needs_update(file_path: str, max_age_seconds: int = CACHE_DURATION) -> bool:
+def needs_update(
+    file_path: str,
+    max_age_seconds: int = CACHE_DURATION,
+    stat_result: Optional[os.stat_result] = None
+) -> bool:
     """
     Check if the file needs to be updated.
 
     Args:
         file_path: Path to the file to check
         max_age_seconds: Maximum age in seconds before refresh
+        stat_result: Already-known stat of the file, to skip the syscall
 
     Returns:
         True if file doesn't exist or is older than max_age_seconds
     """
-    if not os.path.exists(file_path):
-        return True
+    if stat_result is None:
+        try:
+            stat_result = os.stat(file_path)
+        except FileNotFoundError:
+            return True
 
-    file_age = time.time() - os.path.getmtime(file_path)
+    file_age = time.time() - stat_result.st_mtime
     return file_age > max_age_seconds
 
 
-def download_marketplace(github_url: str, file_path: str) -> bool:
+def _get_connection(host: str) -> 'http.client.HTTPSConnection':
+    """Return the calling thread's keep-alive connection to host, creating it if needed."""
+    # Imported here: http.client (and ssl) are only needed when going to the network
+    import http.client
+
+    pool = getattr(_connections, 'pool', None)
+    if pool is None:
+        pool = _connections.pool = {}
+    conn = pool.get(host)
+    if conn is None:
+        conn = pool[host] = http.client.HTTPSConnection(host, timeout=CONNECT_TIMEOUT)
+    return conn
+
+
+def _drop_connection(host: str) -> None:
+    """Close and forget the calling thread's connection to host."""
+    conn = getattr(_connections, 'pool', {}).pop(host, None)
+    if conn is not None:
+        conn.close()
+
+
+def _send_request(
+    host: str,
+    method: str,
+    path: str,
+    headers: Dict[str, str],
+    body: Optional[bytes],
+    timeout: int
+) -> Tuple[Any, bytes]:
     """
-    Download the marketplace JSON file from GitHub API.
+    Send one request on the pooled connection to host, reconnecting and
+    retrying with backoff on connection errors.
+
+    Returns:
+        Tuple of (response, response body)
+    """
+    import http.client
+    import socket
+
+    for attempt in range(HTTP_RETRIES + 1):
+        conn = _get_connection(host)
+        try:
+            if conn.sock is None:
+                conn.connect()
+            conn.sock.settimeout(timeout)
+            conn.request(method, path, body=body, headers=headers)
+            response = conn.getresponse()
+            return response, response.read()
+        except socket.timeout as e:
+            _drop_connection(host)
+            raise TimeoutError(f"Timed out fetching https://{host}{path}") from e
+        except (OSError, http.client.HTTPException) as e:
+            # Server may have closed an idle keep-alive connection; reconnect and retry
+            _drop_connection(host)
+            if attempt == HTTP_RETRIES:
+                raise ConnectionError(f"Request to https://{host}{path} failed: {e}") from e
+            time.sleep(HTTP_RETRY_BACKOFF * attempt)
+
+
+def http_request(
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    body: Optional[bytes] = None,
+    timeout: int = 30
+) -> Tuple[int, Any, bytes]:
+    """
+    Perform an HTTPS request over a pooled keep-alive connection.
+    Follows redirects for GET and retries connection errors with backoff.
+    Requests gzip-compressed responses and returns the decompressed body.
+    Sends GITHUB_TOKEN (if set) as authorization to GitHub hosts only.
+    Requests to GitHub hosts are throttled and retried once after a short
+    rate limit.
+
+    Args:
+        method: HTTP method (GET or POST)
+        url: HTTPS URL to fetch
+        headers: Extra request headers
+        body: Request body for POST
+        timeout: Read timeout in seconds (connect timeout is CONNECT_TIMEOUT)
+
+    Returns:
+        Tuple of (status code, response headers, response body)
+
+    Raises:
+        TimeoutError if the request times out, OSError if it otherwise fails
+    """
+    token = os.environ.get('GITHUB_TOKEN')
+
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urlsplit(url)
+        host = parts.netloc
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        request_headers = {'User-Agent': 'skill-issue-plugin-search', 'Accept-Encoding': 'gzip'}
+        if token and host in GITHUB_HOSTS:
+            request_headers['Authorization'] = f"token {token}"
+        if headers:
+            request_headers.update(headers)
+
+        limiter = _rate_limiters.get(host)
+        for rate_attempt in range(2):
+            if limiter:
+                limiter.acquire()
+            response, data = _send_request(host, method, path, request_headers, body, timeout)
+            if not (limiter and limiter.record(response.status, response.headers)) or rate_attempt:
+                break
+
+        if method == 'GET' and response.status in (301, 302, 303, 307, 308) and response.getheader('Location'):
+            url = urljoin(url, response.getheader('Location'))
+            continue
+
+        if response.getheader('Content-Encoding') == 'gzip':
+            import gzip
+            import zlib
+            try:
+                data = gzip.decompress(data)
+            except (OSError, EOFError, zlib.error) as e:
+                raise ConnectionError(f"Invalid gzip response from {url}: {e}") from e
+
+        return response.status, response.headers, data
+
+    raise ConnectionError(f"Too many redirects: {url}")
+
+
+def http_get(url: str, headers: Optional[Dict[str, str]] = None, timeout: int = 30) -> Tuple[int, Any, bytes]:
+    """Perform an HTTPS GET via http_request."""
+    return http_request('GET', url, headers, timeout=timeout)
+
+
+def download_marketplace(github_url: str, file_path: str, messages: Optional[List[str]] = None) -> bool:
+    """
+    Download the marketplace JSON file from raw.githubusercontent.com.
     Expects a GitHub repository URL (e.g., https://github.com/owner/repo).
 
     Args:
         github_url: GitHub repository URL
         file_path: Local path to save the file
+        messages: If given, error messages are appended here instead of printed,
+            so concurrent downloads can report them in a stable order
 
     Returns:
         True if successful, False otherwise
     """
+    if messages is None:
+        def report(message: str) -> None:
+            print(message, file=sys.stderr)
+    else:
+        report = messages.append
+
     try:
         # Extract owner/repo from GitHub URL
-        match = re.search(r'github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/|$)', github_url)
+        match = _GH_REPO_RE.search(github_url)
         if not match:
-            print(f"Error: Invalid GitHub URL: {github_url}", file=sys.stderr)
+            report(f"Error: Invalid GitHub URL: {github_url}")
             return False
 
         owner = match.group(1)
         repo = match.group(2)
 
-        # Construct GitHub API URL for the marketplace.json file
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/contents/.claude-plugin/marketplace.json"
+        # Fetch the raw file directly (no Contents API envelope or base64)
+        raw_url = f"https://raw.githubusercontent.com/{owner}/{repo}/HEAD/.claude-plugin/marketplace.json"
 
         # Ensure directory exists
         dir_path = os.path.dirname(file_path)
         if dir_path:
             os.makedirs(dir_path, exist_ok=True)
 
-        # Use GitHub API with proper headers
-        result = subprocess.run(
-            ['curl', '-sL', '-H', 'Accept: application/vnd.github.v3+json', api_url],
-            capture_output=True,
-            text=True,
-            timeout=30
-        )
+        # Revalidate the cached copy with its ETag so unchanged files cost no body
+        etag_path = file_path + '.etag'
+        request_headers = {}
+        if os.path.exists(file_path) and os.path.exists(etag_path):
+            with open(etag_path, 'r') as f:
+                request_headers['If-None-Match'] = f.read().strip()
 
-        if result.returncode != 0:
-            print(f"Error: curl failed with code {result.returncode}", file=sys.stderr)
-            if result.stderr:
-                print(f"curl error: {result.stderr}", file=sys.stderr)
-            return False
+        status, response_headers, body = http_get(raw_url, request_headers, timeout=30)
 
-        # GitHub API returns the file content in base64
-        try:
-            import base64
-            api_response = json.loads(result.stdout)
-
-            if 'content' not in api_response:
-                # Check if this is a rate limit error
-                if 'message' in api_response and 'rate limit' in api_response['message'].lower():
-                    print(f"\n⚠️  GitHub API Rate Limit Exceeded", file=sys.stderr)
-                    print(f"   The search will use cached data where available.", file=sys.stderr)
-                    print(f"   To get fresh data, wait ~60 minutes or use authenticated GitHub requests.\n", file=sys.stderr)
-                else:
-                    print(f"Error: GitHub API response missing 'content' field", file=sys.stderr)
-                    print(f"Response: {result.stdout[:200]}", file=sys.stderr)
-                return False
+        if status == 304:
+            # Unchanged upstream: bump mtime so the cache counts as fresh again
+            os.utime(file_path)
+            return True
 
-            # Decode base64 content
-            content = base64.b64decode(api_response['content']).decode('utf-8')
+        if status != 200:
+            if status in (403, 429):
+                report(
+                    "\n⚠️  GitHub Rate Limit Exceeded\n"
+                    "   The search will use cached data where available.\n"
+                    "   To get fresh data, wait ~60 minutes or use authenticated GitHub requests.\n"
+                )
+            else:
+                report(f"Error: HTTP {status} fetching {raw_url}")
+            return False
 
+        try:
             # Validate JSON
-            json.loads(content)
+            _loads(body)
 
             # Write to file
-            with open(file_path, 'w') as f:
-                f.write(content)
+            with open(file_path, 'wb') as f:
+                f.write(body)
+
+            etag = response_headers.get('ETag')
+            if etag:
+                with open(etag_path, 'w') as f:
+                    f.write(etag)
+            elif os.path.exists(etag_path):
+                os.remove(etag_path)
 
             return True
 
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"Error: Invalid GitHub API response: {e}", file=sys.stderr)
+        except (UnicodeDecodeError, json.JSONDecodeError) as e:
+            report(f"Error: Invalid marketplace JSON from {raw_url}: {e}")
             return False
 
-    except subprocess.TimeoutExpired:
-        print("Error: Download timeout", file=sys.stderr)
+    except TimeoutError:
+        report("Error: Download timeout")
         return False
-    except FileNotFoundError:
-        print("Error: curl command not found", file=sys.stderr)
+    except OSError as e:
+        report(f"Error: Download failed: {e}")
         return False
     except Exception as e:
-        print(f"Unexpected error downloading marketplace data: {e}", file=sys.stderr)
+        report(f"Unexpected error downloading marketplace data: {e}")
         return False
 
 
-def ensure_all_marketplaces() -> Dict[str, Any]:
+def load_merged_cache(key: Tuple[Any, ...]) -> Optional[Tuple[Any, ...]]:
     """
-    Ensure all marketplace data is downloaded and fresh.
-    Returns merged marketplace data from all sources.
+    Load the pickled merged plugins, indexes and counts if they were built
+    from the same marketplace files.
+
+    Args:
+        key: Version plus (name, mtime_ns, size) of each loaded marketplace file
+
+    Returns:
+        Tuple of (plugins, index, filters, counts), or None if missing or stale
     """
-    marketplaces = load_marketplaces_config()
-    all_plugins = []
+    try:
+        with open(MERGED_CACHE, 'rb') as f:
+            cached_key, merged = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError):
+        return None
+    return merged if cached_key == key else None
 
-    for marketplace in marketplaces:
-        name = marketplace['name']
-        base_url = marketplace['base_url']
-        file_path = os.path.join(DATA_DIR, f"{name}.json")
 
-        # Download or use cached data
-        if needs_update(file_path):
-            if not download_marketplace(base_url, file_path):
-                if not os.path.exists(file_path):
-                    print(f"Warning: Skipping {name} marketplace (download failed)", file=sys.stderr)
-                    continue
-                else:
-                    print(f"Warning: Using cached {name} data due to download failure.", file=sys.stderr)
+def write_merged_cache(key: Tuple[Any, ...], merged: Tuple[Any, ...]) -> None:
+    """Atomically write the merged plugins, indexes and counts (best effort)."""
+    tmp_path = f"{MERGED_CACHE}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, merged), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, MERGED_CACHE)
+    except OSError:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _text_field(value: Any) -> str:
+    """Return value if it is a string, else '' (marketplace files may hold nulls)."""
+    return value if isinstance(value, str) else ''
+
+
+def _text_list_field(value: Any) -> List[str]:
+    """Return the string items of value if it is a list, else []."""
+    return [item for item in value if isinstance(item, str)] if isinstance(value, list) else []
+
+
+def merge_marketplaces(names: List[str]) -> Tuple[Any, ...]:
+    """
+    Load the named cached marketplaces, precompute per-plugin search fields
+    and build the token index, filter posting sets and counts.
+
+    Args:
+        names: Marketplace names to load, in config order
+
+    Returns:
+        Tuple of (plugins, index, filters, counts, whether every marketplace loaded)
+    """
+    all_plugins = []
+    complete = True
+    for name in names:
+        file_path = os.path.join(DATA_DIR, f"{name}.json")
 
         # Load and merge plugins
         try:
-            with open(file_path, 'r') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = _loads(f.read())
                 plugins = data.get('plugins', [])
                 # Get owner from marketplace data
                 owner_data = data.get('owner', {})
@@ -174,87 +471,252 @@ def ensure_all_marketplaces() -> Dict[str, Any]:
                 for plugin in plugins:
                     plugin['_marketplace'] = name
                     plugin['_owner'] = owner_name
+
+                    # Precompute lowercased search fields once instead of per query,
+                    # skipping null or non-string values from third-party files
+                    plugin_name = _text_field(plugin.get('name'))
+                    category = _text_field(plugin.get('category'))
+                    tags = _text_list_field(plugin.get('tags'))
+                    plugin['_search_blob'] = ' '.join([
+                        plugin_name,
+                        _text_field(plugin.get('description')),
+                        category,
+                        ' '.join(tags),
+                        ' '.join(_text_list_field(plugin.get('keywords')))
+                    ]).lower()
+                    plugin['_tags_lower'] = frozenset(t.lower() for t in tags)
+                    plugin['_category_lower'] = category.lower()
+                    plugin['_name_lower'] = plugin_name.lower()
                 all_plugins.extend(plugins)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             print(f"Warning: Could not load {name} marketplace: {e}", file=sys.stderr)
+            complete = False
             continue
 
+    # In one pass, map each search token and each lowercased marketplace,
+    # category and tag to the positions of plugins having it, and count
+    # plugins per marketplace and category for --list
+    index = {}
+    filters = {'marketplace': {}, 'category': {}, 'tag': {}}
+    counts = {'marketplace': Counter(), 'category': Counter()}
+    for i, plugin in enumerate(all_plugins):
+        for token in _TOKEN_RE.findall(plugin['_search_blob']):
+            index.setdefault(token, set()).add(i)
+        filters['marketplace'].setdefault(plugin['_marketplace'].lower(), set()).add(i)
+        filters['category'].setdefault(plugin['_category_lower'], set()).add(i)
+        for tag in plugin['_tags_lower']:
+            filters['tag'].setdefault(tag, set()).add(i)
+        counts['marketplace'][plugin['_marketplace']] += 1
+        category = plugin.get('category')
+        if category and isinstance(category, str):
+            counts['category'][category] += 1
+
+    return all_plugins, index, filters, counts, complete
+
+
+def ensure_all_marketplaces() -> Dict[str, Any]:
+    """
+    Ensure all marketplace data is downloaded and fresh.
+    Returns merged marketplace data from all sources.
+    """
+    marketplaces = load_marketplaces_config()
+
+    # Stat all cached files with one directory scan
+    try:
+        with os.scandir(DATA_DIR) as entries:
+            stats = {entry.name: entry.stat() for entry in entries}
+    except FileNotFoundError:
+        stats = {}
+
+    # Collect stale marketplaces and download them concurrently
+    stale = []
+    for marketplace in marketplaces:
+        file_name = f"{marketplace['name']}.json"
+        file_path = os.path.join(DATA_DIR, file_name)
+        stat_result = stats.get(file_name)
+        if stat_result is None or needs_update(file_path, stat_result=stat_result):
+            stale.append((marketplace, file_path))
+
+    failed = set()
+    messages = {marketplace['name']: [] for marketplace, _ in stale}
+    if stale:
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        with ThreadPoolExecutor(max_workers=min(MAX_DOWNLOAD_WORKERS, len(stale))) as executor:
+            futures = {
+                executor.submit(
+                    download_marketplace, marketplace['base_url'], file_path, messages[marketplace['name']]
+                ): marketplace['name']
+                for marketplace, file_path in stale
+            }
+            for future in as_completed(futures):
+                if not future.result():
+                    failed.add(futures[future])
+
+    # Emit errors and warnings after all downloads finish, in config order
+    skipped = set()
+    for marketplace, file_path in stale:
+        name = marketplace['name']
+        for message in messages[name]:
+            print(message, file=sys.stderr)
+        if name in failed:
+            if os.path.basename(file_path) not in stats:
+                print(f"Warning: Skipping {name} marketplace (download failed)", file=sys.stderr)
+                skipped.add(name)
+            else:
+                print(f"Warning: Using cached {name} data due to download failure.", file=sys.stderr)
+
+    # Reuse the merged result from a previous run if no marketplace file changed
+    for marketplace, file_path in stale:
+        try:
+            stats[os.path.basename(file_path)] = os.stat(file_path)
+        except FileNotFoundError:
+            pass
+    names = [m['name'] for m in marketplaces if m['name'] not in skipped]
+    key = (MERGED_CACHE_VERSION,) + tuple(
+        (name, stats[f"{name}.json"].st_mtime_ns, stats[f"{name}.json"].st_size)
+        for name in names if f"{name}.json" in stats
+    )
+    merged = load_merged_cache(key)
+    if merged is None:
+        all_plugins, index, filters, counts, complete = merge_marketplaces(names)
+        # Only cache complete results so load warnings repeat until fixed
+        if complete:
+            write_merged_cache(key, (all_plugins, index, filters, counts))
+    else:
+        all_plugins, index, filters, counts = merged
+
     # Flush stderr to ensure messages appear before results
     sys.stderr.flush()
 
     return {
         'plugins': all_plugins,
+        'index': index,
+        'filters': filters,
+        'counts': counts,
         'total_marketplaces': len(marketplaces),
-        'loaded_marketplaces': len([m for m in marketplaces if os.path.exists(os.path.join(DATA_DIR, f"{m['name']}.json"))])
+        'loaded_marketplaces': len(marketplaces) - len(skipped)
     }
 
 
+def compile_query_terms(query_terms: List[str]) -> Optional[Pattern[str]]:
+    """
+    Compile query terms into one alternation pattern so each text is scanned
+    once for all terms instead of once per term.
+
+    Returns:
+        Compiled pattern, or None if there are no terms (nothing can match)
+    """
+    if not query_terms:
+        return None
+    return re.compile('|'.join(re.escape(term) for term in query_terms))
+
+
+def match_query_terms(
+    plugins: List[Dict[str, Any]],
+    index: Dict[str, Set[int]],
+    query_terms: List[str]
+) -> Set[int]:
+    """
+    Find positions of plugins whose search text contains any query term.
+
+    Word-only terms are answered from the token index: such a term can only
+    occur inside a single token, so scanning the vocabulary replaces scanning
+    every plugin. Terms with punctuation fall back to a substring scan.
+
+    Args:
+        plugins: List of plugin dictionaries the index was built from
+        index: Token to plugin positions map from ensure_all_marketplaces()
+        query_terms: Lowercased query terms (OR logic)
+
+    Returns:
+        Set of matching positions in plugins
+    """
+    word_pattern = compile_query_terms([t for t in query_terms if _TOKEN_RE.fullmatch(t)])
+    other_pattern = compile_query_terms([t for t in query_terms if not _TOKEN_RE.fullmatch(t)])
+
+    matched = set()
+    if word_pattern:
+        for token, positions in index.items():
+            if word_pattern.search(token):
+                matched |= positions
+    if other_pattern:
+        matched.update(i for i, p in enumerate(plugins) if other_pattern.search(p['_search_blob']))
+    return matched
+
+
 def search_plugins(
     plugins: List[Dict[str, Any]],
     query: str = None,
     category: str = None,
     tags: List[str] = None,
-    marketplace: str = None
+    marketplace: str = None,
+    index: Dict[str, Set[int]] = None,
+    filters: Dict[str, Dict[str, Set[int]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Search plugins based on query, category, tags, and marketplace.
 
     Args:
-        plugins: List of plugin dictionaries
+        plugins: List of plugin dictionaries from ensure_all_marketplaces()
         query: Search term to match against name and description
         category: Filter by category
         tags: Filter by tags
         marketplace: Filter by marketplace name
+        index: Optional token index over plugins from ensure_all_marketplaces()
+        filters: Optional marketplace/category/tag posting sets from ensure_all_marketplaces()
 
     Returns:
         Filtered list of plugins
     """
-    results = plugins
+    marketplace_lower = marketplace.lower() if marketplace else None
+    category_lower = category.lower() if category else None
+    tag_set = frozenset(tag.lower() for tag in tags) if tags else None
 
-    # Filter by marketplace
-    if marketplace:
-        results = [
-            p for p in results
-            if p.get('_marketplace', '').lower() == marketplace.lower()
-        ]
-
-    # Filter by category
-    if category:
-        results = [
-            p for p in results
-            if p.get('category', '').lower() == category.lower()
-        ]
+    # Query searches name, description, tags, category, keywords
+    # Supports multiple terms with OR logic (any term matches)
+    query_terms = query.lower().split() if query else None
+
+    # Intersect posting sets for the exact-match filters when available;
+    # they then need no per-plugin check
+    positions = None
+    if filters is not None:
+        postings = []
+        if marketplace_lower:
+            postings.append(filters['marketplace'].get(marketplace_lower, set()))
+        if category_lower:
+            postings.append(filters['category'].get(category_lower, set()))
+        if tag_set:
+            postings.append(set().union(*(filters['tag'].get(tag, ()) for tag in tag_set)))
+        if postings:
+            positions = set.intersection(*sorted(postings, key=len))
+        marketplace_lower = category_lower = tag_set = None
+
+    # Narrow to query matches up front when the token index is available,
+    # otherwise scan each plugin once with a single pattern for all terms
+    query_pattern = None
+    if query_terms is not None:
+        if index is not None:
+            matched = match_query_terms(plugins, index, query_terms)
+            positions = matched if positions is None else positions & matched
+        else:
+            query_pattern = compile_query_terms(query_terms)
+            if query_pattern is None:
+                return []
 
-    # Filter by tags
-    if tags:
-        results = [
-            p for p in results
-            if any(tag.lower() in [t.lower() for t in p.get('tags', [])] for tag in tags)
-        ]
+    candidates = plugins if positions is None else [plugins[i] for i in sorted(positions)]
 
-    # Filter by query (search in name, description, tags, category, keywords)
-    # Supports multiple terms with OR logic (any term matches)
-    if query:
-        # Split query into individual terms
-        query_terms = query.lower().split()
-
-        filtered_results = []
-        for plugin in results:
-            # Build searchable text from multiple fields
-            searchable_fields = [
-                plugin.get('name', ''),
-                plugin.get('description', ''),
-                plugin.get('category', ''),
-                ' '.join(plugin.get('tags', [])),
-                ' '.join(plugin.get('keywords', []))
-            ]
-            searchable_text = ' '.join(searchable_fields).lower()
-
-            # Check if ANY query term matches (OR logic)
-            if any(term in searchable_text for term in query_terms):
-                filtered_results.append(plugin)
-
-        results = filtered_results
+    # Apply all remaining filters in a single pass
+    results = []
+    for p in candidates:
+        if marketplace_lower and p.get('_marketplace', '').lower() != marketplace_lower:
+            continue
+        if category_lower and p['_category_lower'] != category_lower:
+            continue
+        if tag_set and tag_set.isdisjoint(p['_tags_lower']):
+            continue
+        if query_pattern and not query_pattern.search(p['_search_blob']):
+            continue
+        results.append(p)
 
     return results
 
@@ -269,17 +731,24 @@ def parse_github_url(url: str) -> Optional[Tuple[str, str, str]]:
     Returns:
         Tuple of (owner, repo, branch) or None if not a valid GitHub URL
     """
-    if not url or 'github.com' not in url:
+    if not url:
+        return None
+    _, sep, tail = url.partition('github.com/')
+    if not sep:
         return None
 
-    # Pattern for GitHub URLs
-    patterns = [
-        r'github\.com/([^/]+)/([^/]+)/tree/([^/]+)',  # With branch
-        r'github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/|$)',  # Without branch
-    ]
+    # Common shapes: split the path instead of running the regexes
+    parts = tail.split('/', 4)
+    if len(parts) >= 4 and parts[0] and parts[1] and parts[2] == 'tree' and parts[3]:
+        return (parts[0], parts[1].replace('.git', ''), parts[3])
+    if 'github.com/' not in tail:
+        if len(parts) >= 2 and parts[0] and parts[1]:
+            return (parts[0], parts[1].replace('.git', ''), 'main')
+        return None
 
-    for pattern in patterns:
-        match = re.search(pattern, url)
+    # URL mentions github.com more than once: try with a branch first, then without
+    for pattern in (_GH_TREE_RE, _GH_REPO_RE):
+        match = pattern.search(url)
         if match:
             owner = match.group(1)
             repo = match.group(2).replace('.git', '')
@@ -289,58 +758,241 @@ def parse_github_url(url: str) -> Optional[Tuple[str, str, str]]:
     return None
 
 
-def fetch_github_repo_info(owner: str, repo: str, branch: str = 'main', plugin_path: str = None) -> Optional[Dict[str, Any]]:
+def github_cache_path(owner: str, repo: str, branch: str, plugin_path: Optional[str]) -> str:
+    """Return the disk cache file for a plugin's GitHub repository info."""
+    import hashlib
+
+    key = f"{owner}/{repo}/{branch}/{plugin_path}"
+    return os.path.join(GITHUB_CACHE_DIR, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+
+def read_github_cache(cache_path: str) -> Optional[Dict[str, Any]]:
     """
-    Fetch repository information from GitHub API.
+    Read a cached GitHub info entry.
+
+    Returns:
+        Dictionary with 'info' and 'etag' keys, or None if missing or unreadable
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            entry = _loads(f.read())
+        return entry if isinstance(entry, dict) and 'info' in entry else None
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def write_github_cache(cache_path: str, info: Dict[str, Any], etag: Optional[str] = None) -> None:
+    """Write a GitHub info entry to the disk cache (best effort)."""
+    try:
+        os.makedirs(GITHUB_CACHE_DIR, exist_ok=True)
+        with open(cache_path, 'wb') as f:
+            f.write(_dumps({'etag': etag, 'info': info}))
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=256)
+def fetch_repo_metadata(owner: str, repo: str, etag: Optional[str] = None) -> Tuple[Optional[int], Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Fetch stars, last update time and default branch of a repository.
+    Cached per run so plugins sharing a repository fetch it once.
 
     Args:
         owner: Repository owner
         repo: Repository name
-        branch: Branch name (default: main)
-        plugin_path: Path to the plugin within the repo (e.g., 'plugins/code-review')
+        etag: ETag of a cached response, sent as If-None-Match
 
     Returns:
-        Dictionary with repo info or None if fetch fails
+        Tuple of (HTTP status, response ETag, metadata); status is None if the
+        request fails and metadata is None unless the status is 200
     """
     try:
-        # Fetch basic repo info
         repo_url = f"https://api.github.com/repos/{owner}/{repo}"
-        result = subprocess.run(
-            ['curl', '-sL', '-H', 'Accept: application/vnd.github.v3+json', repo_url],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
-
-        if result.returncode != 0:
-            return None
-
-        repo_data = json.loads(result.stdout)
-
-        info = {
+        headers = dict(GITHUB_API_HEADERS)
+        if etag:
+            headers['If-None-Match'] = etag
+        status, response_headers, body = http_get(repo_url, headers, timeout=10)
+        if status == 304:
+            return status, etag, None
+        if status != 200:
+            return status, None, None
+
+        repo_data = _loads(body)
+
+        return status, response_headers.get('ETag'), {
             'stars': repo_data.get('stargazers_count', 0),
             'updated_at': repo_data.get('updated_at'),
             'default_branch': repo_data.get('default_branch', 'main'),
         }
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None, None, None
+
+
+@functools.lru_cache(maxsize=256)
+def fetch_repo_tree(owner: str, repo: str, branch: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch the recursive file tree of a repository branch.
+    Cached per run so plugins sharing a repository fetch it once.
+
+    Returns:
+        List of tree entries or None if fetch fails
+    """
+    try:
+        tree_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
+        status, _, body = http_get(tree_url, GITHUB_API_HEADERS, timeout=30)
+        if status != 200:
+            return None
+        return _loads(body).get('tree', [])
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def fetch_repo_contents(owner: str, repo: str, branch: str, path: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    List one repository directory via the Contents API.
+    Cached per run so sibling plugins share their parent listing.
+
+    Returns:
+        List of directory entries or None if fetch fails
+    """
+    try:
+        contents_url = f"https://api.github.com/repos/{owner}/{repo}/contents"
+        if path:
+            contents_url += '/' + quote(path)
+        contents_url += f"?ref={quote(branch, safe='')}"
+        status, _, body = http_get(contents_url, GITHUB_API_HEADERS, timeout=30)
+        if status != 200:
+            return None
+        listing = _loads(body)
+        return listing if isinstance(listing, list) else None
+    except (OSError, json.JSONDecodeError):
+        return None
+
 
-        # Fetch repository tree if plugin_path is provided (including empty string for root)
+def fetch_plugin_tree(owner: str, repo: str, branch: str, plugin_path: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Fetch the recursive file tree of just a plugin's directory, with paths
+    relative to the repository root, so monorepos aren't walked in full.
+    Falls back to the whole repository tree for root plugins or when the
+    directory can't be located.
+
+    Returns:
+        List of tree entries or None if fetch fails
+    """
+    plugin_path = plugin_path.strip('/')
+    if not plugin_path:
+        return fetch_repo_tree(owner, repo, branch)
+
+    parent, _, name = plugin_path.rpartition('/')
+    listing = fetch_repo_contents(owner, repo, branch, parent)
+    sha = next(
+        (entry.get('sha') for entry in listing or () if entry.get('name') == name and entry.get('type') == 'dir'),
+        None
+    )
+    if not sha:
+        return fetch_repo_tree(owner, repo, branch)
+
+    subtree = fetch_repo_tree(owner, repo, sha)
+    if subtree is None:
+        return None
+    prefix = plugin_path + '/'
+    return [dict(item, path=prefix + item.get('path', '')) for item in subtree]
+
+
+# Tree fetches run on one shared pool whose threads (and their keep-alive
+# connections) persist across lookups; each tree is requested once per run
+_tree_futures = {}
+_tree_lock = threading.Lock()
+_tree_executor = None
+
+
+def fetch_tree_async(owner: str, repo: str, branch: str, plugin_path: Optional[str]) -> 'Future':
+    """
+    Start fetching a plugin directory's tree, or the whole repository tree
+    when plugin_path is None or empty, unless it was already requested.
+
+    Returns:
+        Future resolving to the list of tree entries or None if fetch fails
+    """
+    global _tree_executor
+    if plugin_path is not None and not plugin_path.strip('/'):
+        plugin_path = None
+    key = (owner, repo, branch, plugin_path)
+
+    with _tree_lock:
+        future = _tree_futures.get(key)
+        if future is None:
+            if _tree_executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _tree_executor = ThreadPoolExecutor(max_workers=MAX_GITHUB_WORKERS)
+            if plugin_path is None:
+                future = _tree_executor.submit(fetch_repo_tree, owner, repo, branch)
+            else:
+                future = _tree_executor.submit(fetch_plugin_tree, owner, repo, branch, plugin_path)
+            _tree_futures[key] = future
+    return future
+
+
+def fetch_github_repo_info(
+    owner: str,
+    repo: str,
+    branch: str = 'main',
+    plugin_path: str = None,
+    share_tree: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch repository information from GitHub API.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        branch: Branch name (default: main)
+        plugin_path: Path to the plugin within the repo (e.g., 'plugins/code-review')
+        share_tree: Fetch the whole repository tree, to be reused by other plugins
+            in the same repository, instead of only the plugin's directory
+
+    Returns:
+        Dictionary with repo info or None if fetch fails
+    """
+    # Serve from the disk cache while fresh; otherwise revalidate with its ETag
+    cache_path = github_cache_path(owner, repo, branch, plugin_path)
+    cached = read_github_cache(cache_path)
+    if cached and not needs_update(cache_path):
+        return cached['info']
+
+    tree_path = None if share_tree else plugin_path
+
+    try:
+        tree_future = None
+        if not cached and plugin_path is not None:
+            # Nothing cached, so both requests are needed: fetch the tree alongside the metadata
+            tree_future = fetch_tree_async(owner, repo, branch, tree_path)
+        status, etag, metadata = fetch_repo_metadata(owner, repo, cached.get('etag') if cached else None)
+
+        if status == 304 and cached:
+            # Repository unchanged: keep the cached analysis and mark it fresh
+            os.utime(cache_path)
+            return cached['info']
+
+        if metadata is None:
+            # Fall back to stale cached data if the refresh failed
+            return cached['info'] if cached else None
+
+        # Copy so per-plugin fields don't leak into the cached metadata
+        info = dict(metadata)
+        complete = status == 200
+
+        # Analyze repository tree if plugin_path is provided (including empty string for root)
         if plugin_path is not None:
-            tree_url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{branch}?recursive=1"
-            tree_result = subprocess.run(
-                ['curl', '-sL', '-H', 'Accept: application/vnd.github.v3+json', tree_url],
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            tree = (tree_future or fetch_tree_async(owner, repo, branch, tree_path)).result()
+            complete = complete and tree is not None
 
-            if tree_result.returncode == 0:
+            if tree is not None:
                 try:
-                    tree_data = json.loads(tree_result.stdout)
-                    tree = tree_data.get('tree', [])
-
                     # Analyze plugin directory structure
                     commands = []
-                    skills = []
+                    skills = set()
                     agents = []
                     hooks = []
                     has_mcp = False
@@ -351,51 +1003,47 @@ def fetch_github_repo_info(owner: str, repo: str, branch: str = 'main', plugin_p
                     else:
                         plugin_prefix = ""  # Root directory
 
+                    # Hoist per-plugin constants out of the loop
+                    prefix_len = len(plugin_prefix)
+                    hooks_paths = ('hooks/hooks.json', 'hooks.json') if plugin_prefix else ('hooks/hooks.json',)
+
                     for item in tree:
                         path = item.get('path', '')
 
-                        # For root directory, check all paths
-                        # For subdirectory, check only paths within that directory
-                        if not plugin_prefix or path.startswith(plugin_prefix):
-                            relative_path = path[len(plugin_prefix):] if plugin_prefix else path
-
-                            # Check for .mcp.json
-                            if relative_path == '.mcp.json' or relative_path.endswith('/.mcp.json'):
-                                has_mcp = True
-
-                            # Check for commands
-                            if relative_path.startswith('commands/'):
-                                remaining = relative_path[9:]
-                                # Only get direct files in commands/ directory
-                                if remaining and '/' not in remaining:
-                                    if item.get('type') == 'blob':
-                                        commands.append(remaining)
-
-                            # Check for skills
-                            if relative_path.startswith('skills/'):
-                                parts = relative_path[7:].split('/')
-                                # Look for SKILL.md files to identify actual skills
-                                # Skills can be at skills/<name>/SKILL.md or skills/<vendor>/<name>/SKILL.md
-                                if 'SKILL.md' in relative_path:
-                                    # Extract skill path (everything before /SKILL.md)
-                                    skill_path = '/'.join(parts[:-1]) if parts[-1] == 'SKILL.md' else None
-                                    if skill_path and skill_path not in skills:
-                                        skills.append(skill_path)
-
-                            # Check for agents
-                            if relative_path.startswith('agents/'):
-                                remaining = relative_path[7:]
-                                # Only get direct .md files in agents/ directory
-                                if remaining and '/' not in remaining and remaining.endswith('.md'):
-                                    if item.get('type') == 'blob':
-                                        agents.append(remaining)
-
-                            # Check for hooks.json
-                            if relative_path == 'hooks/hooks.json' or (plugin_prefix and relative_path == 'hooks.json'):
+                        # Only check paths within the plugin directory (everything for root)
+                        if not path.startswith(plugin_prefix):
+                            continue
+
+                        # Dispatch on the first path segment below the plugin directory
+                        relative_path = path[prefix_len:]
+                        head, _, remaining = relative_path.partition('/')
+
+                        # Check for .mcp.json
+                        if relative_path == '.mcp.json' or path.endswith('/.mcp.json'):
+                            has_mcp = True
+
+                        if head == 'commands':
+                            # Only get direct files in commands/ directory
+                            if remaining and '/' not in remaining and item.get('type') == 'blob':
+                                commands.append(remaining)
+
+                        elif head == 'skills':
+                            # Look for SKILL.md files to identify actual skills
+                            # Skills can be at skills/<name>/SKILL.md or skills/<vendor>/<name>/SKILL.md
+                            if remaining.endswith('/SKILL.md'):
+                                # Extract skill path (everything before /SKILL.md)
+                                skills.add(remaining[:-9])
+
+                        elif head == 'agents':
+                            # Only get direct .md files in agents/ directory
+                            if '/' not in remaining and remaining.endswith('.md'):
                                 if item.get('type') == 'blob':
-                                    # Mark that we found hooks.json
-                                    # We'll use this as a flag to indicate hooks are present
-                                    hooks.append('hooks.json')
+                                    agents.append(remaining)
+
+                        elif relative_path in hooks_paths and item.get('type') == 'blob':
+                            # Mark that we found hooks.json
+                            # We'll use this as a flag to indicate hooks are present
+                            hooks.append('hooks.json')
 
                     info['commands'] = sorted(commands)
                     info['skills'] = sorted(skills)
@@ -403,17 +1051,173 @@ def fetch_github_repo_info(owner: str, repo: str, branch: str = 'main', plugin_p
                     info['hooks'] = sorted(hooks)
                     info['has_mcp'] = has_mcp
 
-                except (json.JSONDecodeError, KeyError):
-                    pass
+                except (KeyError, AttributeError):
+                    complete = False
+
+        # Only cache full results so a failed tree fetch is retried next run
+        if complete:
+            write_github_cache(cache_path, info, etag)
 
         return info
 
-    except (subprocess.TimeoutExpired, json.JSONDecodeError, KeyError):
-        return None
     except Exception:
         return None
 
 
+def _graphql_tree_names(node: Optional[Dict[str, Any]], entry_type: str = 'blob') -> List[str]:
+    """Return names of entries of the given type in a GraphQL Tree object."""
+    if not node:
+        return []
+    return [e['name'] for e in node.get('entries', []) if e.get('type') == entry_type]
+
+
+def _graphql_skill_paths(node: Optional[Dict[str, Any]]) -> List[str]:
+    """Find skills/<name>/SKILL.md and skills/<vendor>/<name>/SKILL.md in a GraphQL Tree object."""
+    skills = []
+    for entry in (node or {}).get('entries', []):
+        subtree = entry.get('object') or {}
+        if 'SKILL.md' in _graphql_tree_names(subtree):
+            skills.append(entry['name'])
+        for child in subtree.get('entries', []):
+            if 'SKILL.md' in _graphql_tree_names(child.get('object')):
+                skills.append(f"{entry['name']}/{child['name']}")
+    return skills
+
+
+def fetch_github_repo_info_graphql(
+    owner: str,
+    repo: str,
+    branch: str,
+    plugin_paths: List[Optional[str]]
+) -> Optional[Dict[Optional[str], Dict[str, Any]]]:
+    """
+    Fetch repository information for several plugins of one repository
+    with a single GitHub GraphQL request (requires GITHUB_TOKEN).
+
+    Only the plugin subdirectories are requested instead of the full
+    recursive tree. Skills are found up to skills/<vendor>/<name>/SKILL.md
+    and MCP support via a .mcp.json at the plugin root.
+
+    Args:
+        owner: Repository owner
+        repo: Repository name
+        branch: Branch name
+        plugin_paths: Plugin paths within the repo ('' for root, None for stats only)
+
+    Returns:
+        Dictionary mapping each plugin path to its repo info, or None if the request fails
+    """
+    entries = '{ ... on Tree { entries { name type } } }'
+    skill_entries = (
+        '{ ... on Tree { entries { name type object { ... on Tree { entries { name type '
+        'object { ... on Tree { entries { name type } } } } } } } } }'
+    )
+
+    fields = []
+    aliases = {}
+    for i, plugin_path in enumerate(p for p in plugin_paths if p is not None):
+        prefix = plugin_path.rstrip('/') + '/' if plugin_path else ''
+        alias = f"p{i}"
+        aliases[plugin_path] = alias
+
+        def obj(name: str, path: str, selection: str) -> str:
+            expression = json.dumps(f"{branch}:{prefix}{path}")
+            return f"{alias}_{name}: object(expression: {expression}) {selection}"
+
+        fields.append(obj('commands', 'commands', entries))
+        fields.append(obj('agents', 'agents', entries))
+        fields.append(obj('skills', 'skills', skill_entries))
+        fields.append(obj('hooks', 'hooks/hooks.json', '{ __typename }'))
+        if prefix:
+            fields.append(obj('root_hooks', 'hooks.json', '{ __typename }'))
+        fields.append(obj('mcp', '.mcp.json', '{ __typename }'))
+
+    query = (
+        'query($owner: String!, $name: String!) { repository(owner: $owner, name: $name) { '
+        'stargazerCount updatedAt defaultBranchRef { name } ' + ' '.join(fields) + ' } }'
+    )
+    payload = _dumps({'query': query, 'variables': {'owner': owner, 'name': repo}})
+
+    try:
+        status, _, body = http_request(
+            'POST', 'https://api.github.com/graphql',
+            {'Content-Type': 'application/json'}, payload, timeout=30
+        )
+        if status != 200:
+            return None
+        repository = (_loads(body).get('data') or {}).get('repository')
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+
+    if not repository:
+        return None
+
+    metadata = {
+        'stars': repository.get('stargazerCount', 0),
+        'updated_at': repository.get('updatedAt'),
+        'default_branch': (repository.get('defaultBranchRef') or {}).get('name', 'main'),
+    }
+
+    infos = {}
+    for plugin_path in plugin_paths:
+        info = dict(metadata)
+        alias = aliases.get(plugin_path)
+        if alias:
+            hooks = []
+            for name in ('hooks', 'root_hooks'):
+                if (repository.get(f"{alias}_{name}") or {}).get('__typename') == 'Blob':
+                    hooks.append('hooks.json')
+
+            info['commands'] = sorted(_graphql_tree_names(repository.get(f"{alias}_commands")))
+            info['skills'] = sorted(_graphql_skill_paths(repository.get(f"{alias}_skills")))
+            info['agents'] = sorted(
+                n for n in _graphql_tree_names(repository.get(f"{alias}_agents")) if n.endswith('.md')
+            )
+            info['hooks'] = hooks
+            info['has_mcp'] = (repository.get(f"{alias}_mcp") or {}).get('__typename') == 'Blob'
+        infos[plugin_path] = info
+
+    return infos
+
+
+def fetch_github_repo_group(
+    owner: str,
+    repo: str,
+    branch: str,
+    plugin_paths: List[Optional[str]]
+) -> Dict[Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Fetch repository information for all plugins in one repository.
+    Uses one GraphQL request when GITHUB_TOKEN is set, else the REST API.
+
+    Returns:
+        Dictionary mapping each plugin path to its repo info (or None)
+    """
+    if os.environ.get('GITHUB_TOKEN'):
+        # Serve fresh disk cache entries and query GraphQL only for the rest
+        infos = {}
+        missing = []
+        for path in plugin_paths:
+            cache_path = github_cache_path(owner, repo, branch, path)
+            cached = read_github_cache(cache_path)
+            if cached and not needs_update(cache_path):
+                infos[path] = cached['info']
+            else:
+                missing.append(path)
+
+        fetched = fetch_github_repo_info_graphql(owner, repo, branch, missing) if missing else {}
+        if fetched is not None:
+            for path, info in fetched.items():
+                write_github_cache(github_cache_path(owner, repo, branch, path), info)
+            infos.update(fetched)
+            return infos
+
+    # Several plugins in one repository share a single full tree; a lone plugin
+    # fetches only its own directory
+    share_tree = sum(1 for path in plugin_paths if path) > 1
+    return {path: fetch_github_repo_info(owner, repo, branch, path, share_tree) for path in plugin_paths}
+
+
 def format_plugin_compact(plugin: Dict[str, Any]) -> str:
     """Format a plugin in compact mode (optimized for token usage)."""
     name = plugin.get('name', 'Unknown')
@@ -424,8 +1228,92 @@ def format_plugin_compact(plugin: Dict[str, Any]) -> str:
     return f"{name} ({category}) [{owner}] - {description}"
 
 
-def format_plugin_output(plugin: Dict[str, Any], detailed: bool = False) -> str:
-    """Format a plugin for display."""
+def resolve_github_target(plugin: Dict[str, Any]) -> Optional[Tuple[str, str, str, Optional[str]]]:
+    """
+    Work out which GitHub repository and path hold a plugin.
+
+    Args:
+        plugin: Plugin dictionary
+
+    Returns:
+        Tuple of (owner, repo, branch, plugin_path) or None if not on GitHub
+    """
+    # Determine the URL to use for GitHub API and extract plugin path
+    source = plugin.get('source', 'N/A')
+    github_url = plugin.get('homepage', 'N/A')
+    plugin_path = None
+
+    # Get marketplace info for this plugin
+    marketplace_name = plugin.get('_marketplace', 'claude-plugins-official')
+    marketplaces = load_marketplaces_config()
+    marketplace_info = next((m for m in marketplaces if m['name'] == marketplace_name), None)
+
+    # If source is a relative path, construct the GitHub URL from the marketplace base
+    if isinstance(source, str) and (source.startswith('./') or source.startswith('../')):
+        # Get the GitHub URL from marketplace config
+        if marketplace_info:
+            # Extract owner/repo from base_url
+            base_url = marketplace_info['base_url']
+            match = _GH_USERCONTENT_RE.search(base_url)
+            if match:
+                owner = match.group(1)
+                repo = match.group(2)
+                plugin_path = source.lstrip('./')
+                github_url = f"https://github.com/{owner}/{repo}/tree/main/{plugin_path}"
+    elif isinstance(source, dict) and source.get('source') == 'url':
+        # Source is a dict with URL - use it directly and analyze repository root
+        github_url = source.get('url')
+        plugin_path = ""  # Empty string to analyze root directory
+
+    github_info = parse_github_url(github_url)
+    if not github_info:
+        return None
+
+    owner, repo, branch = github_info
+    return (owner, repo, branch, plugin_path)
+
+
+def prefetch_github_info(plugins: List[Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+    """
+    Fetch GitHub information (stars, updated_at, components) for plugins.
+    Plugins are grouped by repository and the groups fetched concurrently.
+
+    Returns:
+        List of repo info dictionaries (or None), in input order
+    """
+    targets = [resolve_github_target(plugin) for plugin in plugins]
+
+    groups = {}
+    for target in targets:
+        if target:
+            owner, repo, branch, plugin_path = target
+            paths = groups.setdefault((owner, repo, branch), [])
+            if plugin_path not in paths:
+                paths.append(plugin_path)
+
+    if not groups:
+        return [None] * len(plugins)
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(MAX_GITHUB_WORKERS, len(groups))) as executor:
+        futures = {
+            key: executor.submit(fetch_github_repo_group, *key, paths)
+            for key, paths in groups.items()
+        }
+        fetched = {key: future.result() for key, future in futures.items()}
+
+    return [fetched[target[:3]][target[3]] if target else None for target in targets]
+
+
+def format_plugin_output(plugin: Dict[str, Any], detailed: bool = False, repo_data: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Format a plugin for display.
+
+    Args:
+        plugin: Plugin dictionary
+        detailed: Include stats, components and installation instructions
+        repo_data: Pre-fetched GitHub info from prefetch_github_info (detailed mode)
+    """
     name = plugin.get('name', 'Unknown')
     description = plugin.get('description', 'No description')
     category = plugin.get('category', 'uncategorized')
@@ -433,43 +1321,16 @@ def format_plugin_output(plugin: Dict[str, Any], detailed: bool = False) -> str:
     tags = plugin.get('tags', [])
     owner = plugin.get('_owner', 'Unknown')
 
-    output = f"\n{'='*80}\n"
-    output += f"📦 {name} [{owner}]\n"
-    output += f"{'='*80}\n"
-    output += f"Category: {category}\n"
-    output += f"Description: {description}\n"
+    parts = [f"\n{'='*80}\n"]
+    parts.append(f"📦 {name} [{owner}]\n")
+    parts.append(f"{'='*80}\n")
+    parts.append(f"Category: {category}\n")
+    parts.append(f"Description: {description}\n")
 
     if tags:
-        output += f"Tags: {', '.join(tags)}\n"
+        parts.append(f"Tags: {', '.join(tags)}\n")
 
     if detailed:
-        # Determine the URL to use for GitHub API and extract plugin path
-        source = plugin.get('source', 'N/A')
-        github_url = homepage
-        plugin_path = None
-
-        # Get marketplace info for this plugin
-        marketplace_name = plugin.get('_marketplace', 'claude-plugins-official')
-        marketplaces = load_marketplaces_config()
-        marketplace_info = next((m for m in marketplaces if m['name'] == marketplace_name), None)
-
-        # If source is a relative path, construct the GitHub URL from the marketplace base
-        if isinstance(source, str) and (source.startswith('./') or source.startswith('../')):
-            # Get the GitHub URL from marketplace config
-            if marketplace_info:
-                # Extract owner/repo from base_url
-                base_url = marketplace_info['base_url']
-                match = re.search(r'github(?:usercontent)?\.com/([^/]+)/([^/]+)', base_url)
-                if match:
-                    owner = match.group(1)
-                    repo = match.group(2)
-                    plugin_path = source.lstrip('./')
-                    github_url = f"https://github.com/{owner}/{repo}/tree/main/{plugin_path}"
-        elif isinstance(source, dict) and source.get('source') == 'url':
-            # Source is a dict with URL - use it directly and analyze repository root
-            github_url = source.get('url')
-            plugin_path = ""  # Empty string to analyze root directory
-
         # First, extract component counts from plugin data (marketplace.json)
         # This ensures we show counts even if GitHub fetch fails
 
@@ -490,25 +1351,18 @@ def format_plugin_output(plugin: Dict[str, Any], detailed: bool = False) -> str:
         if 'mcpServers' in plugin and isinstance(plugin['mcpServers'], list) and len(plugin['mcpServers']) > 0:
             has_mcp = True
 
-        # Fetch GitHub repository information for stars, updated_at, and fallback counts
-        repo_data = None
-        github_info = parse_github_url(github_url)
-        if github_info:
-            owner, repo, branch = github_info
-            repo_data = fetch_github_repo_info(owner, repo, branch, plugin_path)
-
-            if repo_data:
-                # Use GitHub tree analysis as fallback if components not in marketplace.json
-                if not commands:
-                    commands = repo_data.get('commands', [])
-                if not skills:
-                    skills = repo_data.get('skills', [])
-                if not agents:
-                    agents = repo_data.get('agents', [])
-                if not hooks:
-                    hooks = repo_data.get('hooks', [])
-                if not has_mcp:
-                    has_mcp = repo_data.get('has_mcp', False)
+        if repo_data:
+            # Use GitHub tree analysis as fallback if components not in marketplace.json
+            if not commands:
+                commands = repo_data.get('commands', [])
+            if not skills:
+                skills = repo_data.get('skills', [])
+            if not agents:
+                agents = repo_data.get('agents', [])
+            if not hooks:
+                hooks = repo_data.get('hooks', [])
+            if not has_mcp:
+                has_mcp = repo_data.get('has_mcp', False)
 
         # Build stats line (show even if GitHub fetch failed)
         stats_parts = []
@@ -542,45 +1396,45 @@ def format_plugin_output(plugin: Dict[str, Any], detailed: bool = False) -> str:
                 pass
 
         # Output stats line
-        output += f"\n{' | '.join(stats_parts)}\n"
+        parts.append(f"\n{' | '.join(stats_parts)}\n")
 
         # Show detailed lists if there are any components
         if commands or skills or agents or hooks:
-            output += f"\n"
+            parts.append(f"\n")
 
             if commands:
-                output += f"Commands:\n"
+                parts.append(f"Commands:\n")
                 for cmd in commands[:5]:  # Show first 5
-                    output += f"  - {cmd}\n"
+                    parts.append(f"  - {cmd}\n")
                 if len(commands) > 5:
-                    output += f"  ... and {len(commands) - 5} more\n"
+                    parts.append(f"  ... and {len(commands) - 5} more\n")
 
             if skills:
                 if commands:
-                    output += f"\n"
-                output += f"Skills:\n"
+                    parts.append(f"\n")
+                parts.append(f"Skills:\n")
                 for skill in skills[:5]:  # Show first 5
-                    output += f"  - {skill}\n"
+                    parts.append(f"  - {skill}\n")
                 if len(skills) > 5:
-                    output += f"  ... and {len(skills) - 5} more\n"
+                    parts.append(f"  ... and {len(skills) - 5} more\n")
 
             if agents:
                 if commands or skills:
-                    output += f"\n"
-                output += f"Agents:\n"
+                    parts.append(f"\n")
+                parts.append(f"Agents:\n")
                 for agent in agents[:5]:  # Show first 5
-                    output += f"  - {agent}\n"
+                    parts.append(f"  - {agent}\n")
                 if len(agents) > 5:
-                    output += f"  ... and {len(agents) - 5} more\n"
+                    parts.append(f"  ... and {len(agents) - 5} more\n")
 
             if hooks:
                 if commands or skills or agents:
-                    output += f"\n"
-                output += f"Hooks:\n"
+                    parts.append(f"\n")
+                parts.append(f"Hooks:\n")
                 for hook in hooks[:5]:  # Show first 5
-                    output += f"  - {hook}\n"
+                    parts.append(f"  - {hook}\n")
                 if len(hooks) > 5:
-                    output += f"  ... and {len(hooks) - 5} more\n"
+                    parts.append(f"  ... and {len(hooks) - 5} more\n")
 
         # Add installation instructions in detailed mode
         marketplace_name = plugin.get('_marketplace', 'claude-plugins-official')
@@ -593,37 +1447,34 @@ def format_plugin_output(plugin: Dict[str, Any], detailed: bool = False) -> str:
         if marketplace_info:
             # Extract owner/repo from base_url
             base_url = marketplace_info['base_url']
-            match = re.search(r'github\.com/([^/]+/[^/]+?)(?:\.git)?(?:/|$)', base_url)
+            match = _GH_REPO_RE.search(base_url)
             if match:
-                marketplace_repo = match.group(1)
+                marketplace_repo = f"{match.group(1)}/{match.group(2)}"
 
         # Fallback to marketplace name if we can't extract owner/repo
         if not marketplace_repo:
             marketplace_repo = f"anthropics/{marketplace_name}"
 
-        output += f"\n{'─'*80}\n"
-        output += f"📥 Installation:\n"
-        output += f"  # First, add the marketplace (if not already added):\n"
-        output += f"  /plugin marketplace add {marketplace_repo}\n\n"
-        output += f"  # Then install the plugin:\n"
-        output += f"  /plugin install {name}@{marketplace_name}\n"
+        parts.append(f"\n{'─'*80}\n")
+        parts.append(f"📥 Installation:\n")
+        parts.append(f"  # First, add the marketplace (if not already added):\n")
+        parts.append(f"  /plugin marketplace add {marketplace_repo}\n\n")
+        parts.append(f"  # Then install the plugin:\n")
+        parts.append(f"  /plugin install {name}@{marketplace_name}\n")
 
-    output += f"\nHomepage: {homepage}\n"
+    parts.append(f"\nHomepage: {homepage}\n")
 
-    return output
+    return ''.join(parts)
 
 
-def list_categories(plugins: List[Dict[str, Any]]) -> List[str]:
-    """Get unique list of categories."""
-    categories = set()
-    for plugin in plugins:
-        category = plugin.get('category')
-        if category:
-            categories.add(category)
-    return sorted(categories)
+def list_categories(category_counts: Dict[str, int]) -> List[str]:
+    """Get sorted list of categories from the counts built by ensure_all_marketplaces."""
+    return sorted(category_counts)
 
 
 def main():
+    import argparse
+
     parser = argparse.ArgumentParser(
         description='Search Claude Code plugins marketplace',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -689,27 +1540,26 @@ Examples:
     if args.list:
         # List marketplaces
         marketplaces = load_marketplaces_config()
+        counts = marketplace['counts']
         print(f"\nMarketplaces ({len(marketplaces)}):")
         for m in marketplaces:
             name = m['name']
             base_url = m['base_url']
-            count = len([p for p in plugins if p.get('_marketplace') == name])
-            print(f"  • {name} ({count} plugins)")
+            print(f"  • {name} ({counts['marketplace'][name]} plugins)")
             print(f"    {base_url}")
 
         # List categories
-        categories = list_categories(plugins)
+        categories = list_categories(counts['category'])
         print(f"\nCategories ({len(categories)}):")
         for cat in categories:
-            count = len([p for p in plugins if p.get('category') == cat])
-            print(f"  • {cat} ({count} plugins)")
+            print(f"  • {cat} ({counts['category'][cat]} plugins)")
         return
 
     # Handle -d with specific plugin names
     if args.detailed is not None and len(args.detailed) > 0:
         # Specific plugin names provided with -d
-        plugin_names = [name.lower() for name in args.detailed]
-        results = [p for p in plugins if p.get('name', '').lower() in plugin_names]
+        plugin_names = frozenset(name.lower() for name in args.detailed)
+        results = [p for p in plugins if p['_name_lower'] in plugin_names]
 
         print(f"\nFound {len(results)} plugin(s)")
 
@@ -717,8 +1567,12 @@ Examples:
             print("\nNo plugins found with the specified names.")
             print(f"Searched for: {', '.join(args.detailed)}")
         else:
-            for plugin in results:
-                print(format_plugin_output(plugin, detailed=True))
+            repo_infos = prefetch_github_info(results)
+            # Write all results at once rather than one print per plugin
+            sys.stdout.write(''.join(
+                format_plugin_output(plugin, detailed=True, repo_data=repo_data) + '\n'
+                for plugin, repo_data in zip(results, repo_infos)
+            ))
 
             # Show tip if more than 3 results
             if len(results) > 3:
@@ -734,7 +1588,9 @@ Examples:
                 query=None,
                 category=args.category,
                 tags=args.tags,
-                marketplace=args.marketplace
+                marketplace=args.marketplace,
+                index=marketplace.get('index'),
+                filters=marketplace.get('filters')
             )
         else:
             # Search plugins with query
@@ -743,7 +1599,9 @@ Examples:
                 query=args.query,
                 category=args.category,
                 tags=args.tags,
-                marketplace=args.marketplace
+                marketplace=args.marketplace,
+                index=marketplace.get('index'),
+                filters=marketplace.get('filters')
             )
 
         # Output results
@@ -755,8 +1613,11 @@ Examples:
         else:
             # Use detailed format when -d is specified (without args), otherwise use compact format
             if args.detailed is not None:
-                for plugin in results:
-                    print(format_plugin_output(plugin, detailed=True))
+                repo_infos = prefetch_github_info(results)
+                sys.stdout.write(''.join(
+                    format_plugin_output(plugin, detailed=True, repo_data=repo_data) + '\n'
+                    for plugin, repo_data in zip(results, repo_infos)
+                ))
 
                 # Show tip if more than 3 results
                 if len(results) > 3:
@@ -765,8 +1626,9 @@ Examples:
                     print("="*80)
             else:
                 print()  # Empty line before list
-                for i, plugin in enumerate(results, 1):
-                    print(f"{i}. {format_plugin_compact(plugin)}")
+                sys.stdout.write(''.join(
+                    f"{i}. {format_plugin_compact(plugin)}\n" for i, plugin in enumerate(results, 1)
+                ))
 
 
 if __name__ == '__main__':